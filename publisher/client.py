@@ -0,0 +1,372 @@
+"""
+Client Library - Embeddable client untuk mengirim events ke aggregator
+Event di-buffer lokal lalu dikirim per batch oleh background sender,
+memakai session & retry logic yang sama dengan publisher service
+
+Contoh:
+    with AggregatorClient("http://aggregator:8080", on_delivery=report) as client:
+        client.send({"topic": "user.login", "event_id": "...", ...})
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import zstandard
+except ImportError:  # zstd opsional
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "3"))
+SUPPORTED_ENCODINGS = ["none", "gzip"] + (["zstd"] if zstandard is not None else [])
+
+# callback(events, error): error None berarti batch diterima aggregator
+DeliveryCallback = Callable[[List[Dict[str, Any]], Optional[Exception]], None]
+
+class BufferFullError(Exception):
+    """Buffer client penuh (policy drop, atau policy block melewati block_timeout)"""
+
+class DeliveryError(Exception):
+    """Batch ditolak aggregator atau gagal terkirim setelah semua retry"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, detail: Any = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.detail = detail
+
+def create_session(retries: int = 5, pool_maxsize: int = 10) -> requests.Session:
+    """
+    Create requests session dengan retry strategy
+    Keep-alive connection pool dipakai ulang antar request
+    """
+    session = requests.Session()
+
+    retry_strategy = Retry(
+        total=retries,
+        backoff_factor=1,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["POST", "GET"]
+    )
+
+    adapter = HTTPAdapter(max_retries=retry_strategy, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    return session
+
+def compress_body(body: bytes, compression: str, level: int = COMPRESSION_LEVEL) -> tuple:
+    """
+    Compress body JSON sesuai Content-Encoding
+
+    Returns:
+        tuple: (body bytes, headers)
+    """
+    headers = {"Content-Type": "application/json"}
+
+    if compression == "gzip":
+        body = gzip.compress(body, compresslevel=level)
+        headers["Content-Encoding"] = "gzip"
+    elif compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd compression requested but zstandard is not installed")
+        body = zstandard.ZstdCompressor(level=level).compress(body)
+        headers["Content-Encoding"] = "zstd"
+
+    return body, headers
+
+def encode_body(payload: Dict[str, Any], compression: str, level: int = COMPRESSION_LEVEL) -> tuple:
+    """
+    Encode payload JSON dan compress sesuai Content-Encoding
+
+    Returns:
+        tuple: (body bytes, headers)
+    """
+    return compress_body(json.dumps(payload, separators=(",", ":")).encode("utf-8"), compression, level)
+
+class AggregatorClient:
+    """
+    Client embeddable untuk POST /publish dengan batching lokal
+
+    - send() / send_async() hanya menaruh event di buffer; sender thread
+      mengirim batch saat batch_size event atau max_batch_bytes terkumpul,
+      atau linger_ms setelah event tertua masuk buffer
+    - Buffer dibatasi buffer_max_events: policy "block" menunggu ruang
+      (maksimal block_timeout), policy "drop" langsung menolak event
+    - Hasil delivery dilaporkan lewat callback(events, error) dari sender
+      thread; event yang ditolak buffer juga dilaporkan dengan BufferFullError
+    - Satu Idempotency-Key per batch, sehingga retry adapter tidak
+      meng-enqueue ulang batch yang sudah diterima aggregator
+    """
+
+    POLICIES = ("block", "drop")
+
+    def __init__(
+        self,
+        aggregator_url: str,
+        batch_size: int = 100,
+        linger_ms: float = 50.0,
+        max_batch_bytes: int = 1_000_000,
+        buffer_max_events: int = 10_000,
+        on_full: str = "block",
+        block_timeout: Optional[float] = None,
+        compression: str = "none",
+        retries: int = 5,
+        timeout: float = 30.0,
+        on_delivery: Optional[DeliveryCallback] = None
+    ):
+        if on_full not in self.POLICIES:
+            raise ValueError(f"on_full must be one of {self.POLICIES}")
+        if compression not in SUPPORTED_ENCODINGS:
+            raise ValueError(f"compression must be one of {SUPPORTED_ENCODINGS}")
+
+        self.publish_url = f"{aggregator_url.rstrip('/')}/publish"
+        self.batch_size = max(1, batch_size)
+        self.linger = linger_ms / 1000
+        self.max_batch_bytes = max_batch_bytes
+        self.buffer_max_events = max(self.batch_size, buffer_max_events)
+        self.on_full = on_full
+        self.block_timeout = block_timeout
+        self.compression = compression
+        self.timeout = timeout
+        self.on_delivery = on_delivery
+        self.session = create_session(retries)
+
+        # Item buffer: (encoded event, event, callback, waktu enqueue)
+        self._buffer: deque = deque()
+        self._buffer_bytes = 0
+        self._in_flight = 0
+        self._flush_requested = False
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self.stats = {
+            "enqueued": 0,
+            "dropped": 0,
+            "sent": 0,
+            "batches": 0,
+            "errors": 0,
+            "bytes_sent": 0
+        }
+
+        self._sender = threading.Thread(target=self._run, name="aggregator-client-sender", daemon=True)
+        self._sender.start()
+
+    @property
+    def pending(self) -> int:
+        """Jumlah event yang belum terkonfirmasi (di buffer + sedang dikirim)"""
+        with self._cond:
+            return len(self._buffer) + self._in_flight
+
+    def _encode(self, event: Dict[str, Any]) -> bytes:
+        encoded = json.dumps(event, separators=(",", ":")).encode("utf-8")
+        if len(encoded) > self.max_batch_bytes:
+            raise ValueError(f"Event is larger than max_batch_bytes ({len(encoded)} > {self.max_batch_bytes})")
+        return encoded
+
+    def _offer(self, encoded: bytes, event: Dict[str, Any], callback: Optional[DeliveryCallback], wait: bool) -> Optional[bool]:
+        """
+        Taruh event di buffer
+
+        Returns:
+            True jika masuk buffer, False jika ditolak, None jika buffer penuh
+            dan wait=False (caller harus menunggu di luar event loop)
+        """
+        with self._cond:
+            deadline = None if self.block_timeout is None else time.monotonic() + self.block_timeout
+            while len(self._buffer) >= self.buffer_max_events and not self._closed:
+                if self.on_full == "drop":
+                    break
+                if not wait:
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            if self._closed:
+                raise RuntimeError("AggregatorClient is closed")
+
+            if len(self._buffer) < self.buffer_max_events:
+                self._buffer.append((encoded, event, callback, time.monotonic()))
+                self._buffer_bytes += len(encoded)
+                self.stats["enqueued"] += 1
+                self._cond.notify_all()
+                return True
+
+            self.stats["dropped"] += 1
+
+        self._report([event], [callback], BufferFullError(f"Client buffer full ({self.buffer_max_events} events)"))
+        return False
+
+    def send(self, event: Dict[str, Any], callback: Optional[DeliveryCallback] = None) -> bool:
+        """
+        Enqueue satu event (thread-safe)
+
+        Returns:
+            bool: True jika event masuk buffer, False jika ditolak karena penuh
+        """
+        return self._offer(self._encode(event), event, callback, wait=True)
+
+    async def send_async(self, event: Dict[str, Any], callback: Optional[DeliveryCallback] = None) -> bool:
+        """
+        Versi asyncio dari send(): event loop tidak pernah ikut terblokir
+        Jika buffer penuh dengan policy block, penantian dipindah ke thread
+        """
+        encoded = self._encode(event)
+        accepted = self._offer(encoded, event, callback, wait=False)
+        if accepted is None:
+            accepted = await asyncio.to_thread(self._offer, encoded, event, callback, True)
+        return accepted
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Kirim isi buffer sekarang tanpa menunggu linger
+
+        Returns:
+            bool: True jika semua event sudah terkirim (atau gagal final) sebelum timeout
+        """
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._buffer and not self._in_flight, timeout)
+
+    async def flush_async(self, timeout: Optional[float] = None) -> bool:
+        return await asyncio.to_thread(self.flush, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Flush sisa buffer, hentikan sender thread dan tutup session"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._sender.join(timeout)
+        if self._sender.is_alive():
+            logger.warning(f"AggregatorClient closed with {self.pending} events still pending")
+        self.session.close()
+
+    async def close_async(self, timeout: Optional[float] = None):
+        await asyncio.to_thread(self.close, timeout)
+
+    def __enter__(self) -> "AggregatorClient":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    async def __aenter__(self) -> "AggregatorClient":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close_async()
+
+    def _ready(self) -> bool:
+        """Apakah batch berikutnya harus dikirim sekarang (dipanggil dengan lock)"""
+        return (
+            self._closed
+            or self._flush_requested
+            or len(self._buffer) >= self.batch_size
+            or self._buffer_bytes >= self.max_batch_bytes
+            or time.monotonic() - self._buffer[0][3] >= self.linger
+        )
+
+    def _drain(self) -> List[tuple]:
+        """Ambil satu batch dari buffer, dibatasi batch_size dan max_batch_bytes"""
+        batch = []
+        size = 2  # kurung array
+        while self._buffer and len(batch) < self.batch_size:
+            encoded = self._buffer[0][0]
+            if batch and size + len(encoded) + 1 > self.max_batch_bytes:
+                break
+            batch.append(self._buffer.popleft())
+            size += len(encoded) + 1
+            self._buffer_bytes -= len(encoded)
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not (self._buffer and self._ready()):
+                    if not self._buffer:
+                        self._flush_requested = False
+                        if self._closed:
+                            return
+                        self._cond.wait()
+                    else:
+                        self._cond.wait(max(0.0, self.linger - (time.monotonic() - self._buffer[0][3])))
+                batch = self._drain()
+                self._in_flight = len(batch)
+                # Ruang buffer tersedia untuk producer yang menunggu
+                self._cond.notify_all()
+
+            try:
+                self._deliver(batch)
+            except Exception as e:
+                logger.error(f"AggregatorClient sender error: {e}", exc_info=True)
+            finally:
+                with self._cond:
+                    self._in_flight = 0
+                    self._cond.notify_all()
+
+    def _deliver(self, batch: List[tuple]):
+        """POST satu batch ke /publish dan laporkan hasilnya"""
+        events = [item[1] for item in batch]
+        # Event sudah di-encode saat send(), body cukup digabung
+        body = b'{"events":[' + b",".join(item[0] for item in batch) + b"]}"
+        body, headers = compress_body(body, self.compression)
+        headers["Idempotency-Key"] = str(uuid.uuid4())
+
+        error = None
+        try:
+            response = self.session.post(self.publish_url, data=body, headers=headers, timeout=self.timeout)
+            if response.status_code >= 400:
+                try:
+                    detail = response.json().get("detail")
+                except ValueError:
+                    detail = response.text
+                error = DeliveryError(
+                    f"Aggregator rejected batch: HTTP {response.status_code}",
+                    status_code=response.status_code,
+                    detail=detail
+                )
+        except requests.exceptions.RequestException as e:
+            error = DeliveryError(f"Failed to send batch: {e}")
+
+        if error is None:
+            self.stats["sent"] += len(events)
+            self.stats["batches"] += 1
+            self.stats["bytes_sent"] += len(body)
+        else:
+            self.stats["errors"] += 1
+            logger.error(f"✗ {error}")
+
+        self._report(events, [item[2] for item in batch], error)
+
+    def _report(self, events: List[Dict[str, Any]], callbacks: List[Optional[DeliveryCallback]], error: Optional[Exception]):
+        """Panggil callback per send() (dikelompokkan) lalu on_delivery untuk seluruh batch"""
+        grouped: Dict[int, tuple] = {}
+        for event, callback in zip(events, callbacks):
+            if callback is not None:
+                grouped.setdefault(id(callback), (callback, []))[1].append(event)
+
+        targets = list(grouped.values())
+        if self.on_delivery is not None:
+            targets.append((self.on_delivery, events))
+
+        for callback, delivered in targets:
+            try:
+                callback(delivered, error)
+            except Exception as e:
+                logger.error(f"Delivery callback failed: {e}", exc_info=True)
@@ -7,13 +7,18 @@ import time
 import random
 import logging
 import json
+import bisect
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import uuid
 
 import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+
+from client import SUPPORTED_ENCODINGS, create_session, encode_body
 
 # Logging setup
 logging.basicConfig(
@@ -29,6 +34,32 @@ BATCH_SIZE = int(os.getenv("BATCH_SIZE", "100"))
 DUPLICATE_RATE = float(os.getenv("DUPLICATE_RATE", "0.3"))  # 30% duplikasi
 TOTAL_EVENTS = int(os.getenv("TOTAL_EVENTS", "20000"))
 DELAY_BETWEEN_BATCHES = float(os.getenv("DELAY_BETWEEN_BATCHES", "0.5"))
+PUBLISH_COMPRESSION = os.getenv("PUBLISH_COMPRESSION", "none")  # none | gzip | zstd
+PUBLISHER_MODE = os.getenv("PUBLISHER_MODE", "simulation")  # simulation | compression-bench | capacity-sweep
+BENCH_BATCH_SIZES = [int(x) for x in os.getenv("BENCH_BATCH_SIZES", "10,100,500,1000").split(",")]
+BENCH_EVENTS_PER_RUN = int(os.getenv("BENCH_EVENTS_PER_RUN", "5000"))
+
+# Workload model (distribusi topic/source, jarak duplikat, pola kedatangan)
+TOPIC_ZIPF_S = float(os.getenv("TOPIC_ZIPF_S", "0"))  # 0 = uniform, ~1.0 = skew realistis
+SOURCE_ZIPF_S = float(os.getenv("SOURCE_ZIPF_S", "0"))
+DUPLICATE_RECENT_WINDOW = int(os.getenv("DUPLICATE_RECENT_WINDOW", "1000"))  # duplikat jarak dekat
+DUPLICATE_RESERVOIR_SIZE = int(os.getenv("DUPLICATE_RESERVOIR_SIZE", "100000"))  # sample seluruh histori
+DUPLICATE_LONG_DELAY_FRACTION = float(os.getenv("DUPLICATE_LONG_DELAY_FRACTION", "0"))  # porsi duplikat dari reservoir
+ARRIVAL_PATTERN = os.getenv("ARRIVAL_PATTERN", "constant")  # constant | poisson | bursty
+BURST_FACTOR = float(os.getenv("BURST_FACTOR", "10"))  # burst: delay dibagi faktor ini
+BURST_FRACTION = float(os.getenv("BURST_FRACTION", "0.2"))  # porsi batch yang dikirim saat burst
+BURST_LENGTH = float(os.getenv("BURST_LENGTH", "20"))  # rata-rata panjang burst (batch)
+
+# Capacity sweep: offered load naik bertahap sampai aggregator tidak mampu mengikuti
+SWEEP_START_RATE = float(os.getenv("SWEEP_START_RATE", "500"))  # events/s
+SWEEP_STEP_RATE = float(os.getenv("SWEEP_STEP_RATE", "500"))
+SWEEP_MAX_RATE = float(os.getenv("SWEEP_MAX_RATE", "20000"))
+SWEEP_STEP_SECONDS = float(os.getenv("SWEEP_STEP_SECONDS", "15"))
+SWEEP_SETTLE_SECONDS = float(os.getenv("SWEEP_SETTLE_SECONDS", "2"))  # tunggu consumer sebelum sampling /stats
+SWEEP_KEEPUP_RATIO = float(os.getenv("SWEEP_KEEPUP_RATIO", "0.95"))  # received rate / offered rate minimum
+SWEEP_STEPS_PAST_KNEE = int(os.getenv("SWEEP_STEPS_PAST_KNEE", "2"))
+SWEEP_CONCURRENCY = int(os.getenv("SWEEP_CONCURRENCY", "16"))
+SWEEP_REPORT_PATH = os.getenv("SWEEP_REPORT_PATH", "")  # kosong = hanya stdout
 
 # Topics untuk simulasi
 TOPICS = [
@@ -54,12 +85,90 @@ SOURCES = [
     "api-gateway-2"
 ]
 
+def zipf_cum_weights(n: int, s: float) -> List[float]:
+    """Cumulative weight Zipf(s) untuk n item (rank 1 paling sering); s=0 uniform"""
+    return list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+
 class EventGenerator:
-    """Generator untuk membuat events realistik"""
+    """
+    Generator untuk membuat events realistik
+    
+    Workload model:
+    - topic & source dipilih dengan distribusi Zipf (TOPIC_ZIPF_S / SOURCE_ZIPF_S)
+    - duplikat jarak dekat diambil dari window event terbaru, duplikat jarak
+      jauh dari reservoir sample (Algorithm R) seluruh histori, sehingga
+      jaraknya bisa jutaan event; memori tetap terbatas pada ukuran reservoir
+    - jeda antar batch constant, poisson, atau bursty (ARRIVAL_PATTERN)
+    """
     
-    def __init__(self):
-        self.event_cache: List[Dict[str, Any]] = []  # Cache untuk duplikasi
+    def __init__(
+        self,
+        topic_zipf_s: float = TOPIC_ZIPF_S,
+        source_zipf_s: float = SOURCE_ZIPF_S,
+        recent_window: int = DUPLICATE_RECENT_WINDOW,
+        reservoir_size: int = DUPLICATE_RESERVOIR_SIZE,
+        long_delay_fraction: float = DUPLICATE_LONG_DELAY_FRACTION,
+        arrival_pattern: str = ARRIVAL_PATTERN
+    ):
         self.event_counter = 0
+        self.topic_weights = zipf_cum_weights(len(TOPICS), topic_zipf_s)
+        self.source_weights = zipf_cum_weights(len(SOURCES), source_zipf_s)
+        # Hanya identitas (topic, event_id, source, timestamp) yang disimpan
+        self.recent: deque = deque(maxlen=max(1, recent_window))
+        self.reservoir: List[tuple] = []
+        self.reservoir_size = reservoir_size
+        self.long_delay_fraction = long_delay_fraction
+        self.arrival_pattern = arrival_pattern
+        self.in_burst = False
+        self.duplicates_generated = 0
+    
+    def _pick(self, items: List[str], cum_weights: List[float]) -> str:
+        return items[bisect.bisect(cum_weights, random.random() * cum_weights[-1])]
+    
+    def _remember(self, event: Dict[str, Any]):
+        """Simpan identitas event ke recent window & reservoir"""
+        identity = (event["topic"], event["event_id"], event["source"], event["timestamp"])
+        self.recent.append(identity)
+        if len(self.reservoir) < self.reservoir_size:
+            self.reservoir.append(identity)
+        else:
+            slot = random.randrange(self.event_counter)
+            if slot < self.reservoir_size:
+                self.reservoir[slot] = identity
+    
+    def generate_duplicate(self) -> Optional[Dict[str, Any]]:
+        """Kirim ulang event lama (topic & event_id sama, payload dibangkitkan ulang)"""
+        pool = self.reservoir if random.random() < self.long_delay_fraction else self.recent
+        if not pool:
+            return None
+        topic, event_id, source, timestamp = random.choice(pool)
+        return {
+            "topic": topic,
+            "event_id": event_id,
+            "timestamp": timestamp,
+            "source": source,
+            "payload": self.generate_payload(topic)
+        }
+    
+    def arrival_delay(self, base: float) -> float:
+        """
+        Jeda sebelum batch berikutnya; rata-rata tetap `base` untuk semua pola
+        
+        bursty: dua state (burst/idle) Markov; saat burst jeda = base / BURST_FACTOR,
+        jeda idle dikompensasi agar rata-rata offered load tidak berubah.
+        """
+        if base <= 0 or self.arrival_pattern == "constant":
+            return base
+        if self.arrival_pattern == "poisson":
+            return random.expovariate(1.0 / base)
+        
+        leave_burst = 1.0 / max(1.0, BURST_LENGTH)
+        enter_burst = leave_burst * BURST_FRACTION / (1.0 - BURST_FRACTION)
+        if random.random() < (leave_burst if self.in_burst else enter_burst):
+            self.in_burst = not self.in_burst
+        if self.in_burst:
+            return base / BURST_FACTOR
+        return base * (1.0 - BURST_FRACTION / BURST_FACTOR) / (1.0 - BURST_FRACTION)
     
     def generate_event_id(self) -> str:
         """
@@ -112,8 +221,8 @@ class EventGenerator:
     
     def generate_event(self) -> Dict[str, Any]:
         """Generate single event"""
-        topic = random.choice(TOPICS)
-        source = random.choice(SOURCES)
+        topic = self._pick(TOPICS, self.topic_weights)
+        source = self._pick(SOURCES, self.source_weights)
         
         event = {
             "topic": topic,
@@ -144,18 +253,17 @@ class EventGenerator:
         for _ in range(num_new):
             event = self.generate_event()
             events.append(event)
-            # Cache untuk kemungkinan duplikasi di masa depan
-            if len(self.event_cache) < 1000:
-                self.event_cache.append(event)
-        
-        # Add duplicates from cache
-        if num_duplicates > 0 and self.event_cache:
-            for _ in range(num_duplicates):
-                # Pilih event dari cache dan kirim lagi (duplikasi)
-                duplicate_event = random.choice(self.event_cache).copy()
-                # Update timestamp untuk simulasi "late duplicate"
-                duplicate_event["timestamp"] = datetime.now(timezone.utc).isoformat()
-                events.append(duplicate_event)
+            self._remember(event)
+        
+        # Add duplicates dari window terbaru / reservoir histori
+        for _ in range(num_duplicates):
+            duplicate_event = self.generate_duplicate()
+            if duplicate_event is None:
+                break
+            # Update timestamp untuk simulasi "late duplicate"
+            duplicate_event["timestamp"] = datetime.now(timezone.utc).isoformat()
+            events.append(duplicate_event)
+            self.duplicates_generated += 1
         
         # Shuffle untuk distribusi acak duplikat
         random.shuffle(events)
@@ -165,8 +273,9 @@ class EventGenerator:
 class Publisher:
     """Publisher untuk mengirim events ke aggregator"""
     
-    def __init__(self, aggregator_url: str):
+    def __init__(self, aggregator_url: str, compression: str = PUBLISH_COMPRESSION):
         self.aggregator_url = aggregator_url
+        self.compression = compression
         self.session = self._create_session()
         self.generator = EventGenerator()
         
@@ -174,28 +283,16 @@ class Publisher:
             "sent": 0,
             "batches": 0,
             "errors": 0,
-            "duplicates_sent": 0
+            "duplicates_sent": 0,
+            "bytes_sent": 0
         }
     
-    def _create_session(self) -> requests.Session:
+    def _create_session(self, retries: int = 5) -> requests.Session:
         """
         Create requests session dengan retry strategy
         Untuk reliability pada network issues
         """
-        session = requests.Session()
-        
-        retry_strategy = Retry(
-            total=5,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["POST", "GET"]
-        )
-        
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        
-        return session
+        return create_session(retries, pool_maxsize=max(10, SWEEP_CONCURRENCY))
     
     def wait_for_aggregator(self, timeout: int = 60):
         """
@@ -228,10 +325,15 @@ class Publisher:
         """
         try:
             payload = {"events": events}
+            body, headers = encode_body(payload, self.compression)
+            # Key yang sama dikirim ulang oleh Retry adapter, sehingga batch
+            # yang sudah diterima aggregator tidak di-enqueue ulang
+            headers["Idempotency-Key"] = str(uuid.uuid4())
             
             response = self.session.post(
                 PUBLISH_ENDPOINT,
-                json=payload,
+                data=body,
+                headers=headers,
                 timeout=30
             )
             
@@ -239,6 +341,7 @@ class Publisher:
             
             self.stats["sent"] += len(events)
             self.stats["batches"] += 1
+            self.stats["bytes_sent"] += len(body)
             
             logger.info(
                 f"✓ Sent batch {self.stats['batches']}: "
@@ -274,7 +377,11 @@ class Publisher:
         logger.info(f"Total events: {total_events}")
         logger.info(f"Batch size: {batch_size}")
         logger.info(f"Duplicate rate: {duplicate_rate * 100:.1f}%")
-        logger.info(f"Delay between batches: {delay}s")
+        logger.info(f"Delay between batches: {delay}s ({self.generator.arrival_pattern})")
+        logger.info(
+            f"Workload: topic zipf s={TOPIC_ZIPF_S}, source zipf s={SOURCE_ZIPF_S}, "
+            f"long-delay duplicates {DUPLICATE_LONG_DELAY_FRACTION * 100:.0f}%"
+        )
         logger.info("=" * 60)
         
         num_batches = (total_events + batch_size - 1) // batch_size
@@ -287,20 +394,17 @@ class Publisher:
             current_batch_size = min(batch_size, events_remaining)
             
             # Generate batch
+            duplicates_before = self.generator.duplicates_generated
             events = self.generator.generate_batch(
                 current_batch_size,
                 duplicate_rate
             )
             
-            # Track duplicates
-            duplicates_in_batch = sum(
-                1 for e in events
-                if e in self.generator.event_cache
-            )
-            self.stats["duplicates_sent"] += duplicates_in_batch
-            
             # Publish
             success = self.publish_batch(events)
+            if success:
+                # Track duplicates
+                self.stats["duplicates_sent"] += self.generator.duplicates_generated - duplicates_before
             
             if not success:
                 logger.warning(f"Batch {batch_num + 1} failed, continuing...")
@@ -317,9 +421,9 @@ class Publisher:
                     f"{self.stats['errors']} errors"
                 )
             
-            # Delay antar batch
+            # Delay antar batch (sesuai ARRIVAL_PATTERN)
             if events_remaining > 0:
-                time.sleep(delay)
+                time.sleep(self.generator.arrival_delay(delay))
         
         # Final statistics
         elapsed = time.time() - start_time
@@ -333,10 +437,240 @@ class Publisher:
         logger.info(f"Total batches: {self.stats['batches']}")
         logger.info(f"Duplicates sent: {self.stats['duplicates_sent']}")
         logger.info(f"Errors: {self.stats['errors']}")
+        logger.info(f"Bytes sent ({self.compression}): {self.stats['bytes_sent']}")
         logger.info(f"Elapsed time: {elapsed:.2f}s")
         logger.info(f"Average rate: {self.stats['sent'] / elapsed:.1f} events/s")
         logger.info("=" * 60)
     
+    def run_compression_benchmark(self, batch_sizes: List[int], events_per_run: int) -> List[Dict[str, Any]]:
+        """
+        Bandingkan throughput ingest /publish dengan dan tanpa compression
+        
+        Untuk setiap batch size dan encoding, kirim events_per_run events
+        secepatnya (tanpa delay) dan ukur events/s, bytes di wire, dan waktu
+        CPU untuk compress di sisi publisher.
+        
+        Returns:
+            List hasil per (encoding, batch_size)
+        """
+        encodings = list(SUPPORTED_ENCODINGS)
+        results = []
+        
+        for batch_size in batch_sizes:
+            # Batch yang sama untuk semua encoding agar perbandingan adil
+            batches = [
+                self.generator.generate_batch(batch_size)
+                for _ in range(max(1, events_per_run // batch_size))
+            ]
+            raw_bytes = sum(len(encode_body({"events": b}, "none")[0]) for b in batches)
+            
+            for encoding in encodings:
+                wire_bytes = 0
+                encode_seconds = 0.0
+                errors = 0
+                start = time.perf_counter()
+                
+                for events in batches:
+                    t0 = time.perf_counter()
+                    body, headers = encode_body({"events": events}, encoding)
+                    encode_seconds += time.perf_counter() - t0
+                    wire_bytes += len(body)
+                    try:
+                        response = self.session.post(PUBLISH_ENDPOINT, data=body, headers=headers, timeout=30)
+                        response.raise_for_status()
+                    except requests.exceptions.RequestException:
+                        errors += 1
+                
+                elapsed = time.perf_counter() - start
+                sent = sum(len(b) for b in batches)
+                result = {
+                    "encoding": encoding,
+                    "batch_size": batch_size,
+                    "events": sent,
+                    "errors": errors,
+                    "elapsed_seconds": round(elapsed, 3),
+                    "events_per_second": round(sent / elapsed, 1) if elapsed > 0 else 0,
+                    "raw_bytes": raw_bytes,
+                    "wire_bytes": wire_bytes,
+                    "compression_ratio": round(raw_bytes / wire_bytes, 2) if wire_bytes else 0,
+                    "encode_ms_per_batch": round(encode_seconds * 1000 / len(batches), 3)
+                }
+                results.append(result)
+                logger.info(
+                    f"[bench] {encoding:>4} batch={batch_size:<5} "
+                    f"{result['events_per_second']:>9.1f} events/s, "
+                    f"ratio {result['compression_ratio']:.2f}x, "
+                    f"encode {result['encode_ms_per_batch']:.3f} ms/batch"
+                )
+        
+        return results
+    
+    def _sample_aggregator(self) -> Dict[str, Any]:
+        """Ambil counter received (/stats) dan kedalaman queue (/health)"""
+        stats = self.session.get(f"{self.aggregator_url}/stats", timeout=10).json()
+        health = self.session.get(f"{self.aggregator_url}/health", timeout=10).json()
+        return {
+            "at": time.monotonic(),
+            "received": stats.get("received", 0),
+            "queue_size": health.get("queue", {}).get("size", 0)
+        }
+    
+    @staticmethod
+    def _percentile(values: List[float], q: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    
+    def _run_sweep_step(self, rate: float, duration: float, batch_size: int, pool: ThreadPoolExecutor) -> Dict[str, Any]:
+        """
+        Offer `rate` events/s selama `duration` detik (open loop)
+        
+        Batch dijadwalkan pada interval tetap dan dikirim oleh thread pool,
+        sehingga request yang lambat tidak menurunkan offered load.
+        """
+        sessions = threading.local()
+        latencies: List[float] = []
+        outcome = {"sent": 0, "errors": 0, "rejected": 0}
+        lock = threading.Lock()
+        
+        def send(events: List[Dict[str, Any]]):
+            if not hasattr(sessions, "session"):
+                # Tanpa retry: retry menyembunyikan saturasi dan mengacaukan latency
+                sessions.session = self._create_session(retries=0)
+            body, headers = encode_body({"events": events}, self.compression)
+            started = time.perf_counter()
+            try:
+                response = sessions.session.post(f"{self.aggregator_url}/publish", data=body, headers=headers, timeout=30)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    if response.status_code == 503:
+                        outcome["rejected"] += len(events)
+                    elif response.ok:
+                        outcome["sent"] += len(events)
+                    else:
+                        outcome["errors"] += len(events)
+            except requests.exceptions.RequestException:
+                with lock:
+                    outcome["errors"] += len(events)
+        
+        interval = batch_size / rate
+        futures = []
+        before = self._sample_aggregator()
+        start = time.monotonic()
+        next_send = start
+        while next_send < start + duration:
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(send, self.generator.generate_batch(batch_size, DUPLICATE_RATE)))
+            next_send += interval
+        for future in futures:
+            future.result()
+        offered_elapsed = time.monotonic() - start
+        
+        time.sleep(SWEEP_SETTLE_SECONDS)
+        after = self._sample_aggregator()
+        window = after["at"] - before["at"]
+        
+        # Settle memberi waktu consumer menghabiskan event step ini; yang
+        # belum terproses setelah itu tercermin di keepup_ratio < 1
+        offered = len(futures) * batch_size
+        received = after["received"] - before["received"]
+        return {
+            "target_rate": rate,
+            "offered_rate": round(offered / offered_elapsed, 1) if offered_elapsed > 0 else 0.0,
+            "accepted_rate": round(outcome["sent"] / offered_elapsed, 1) if offered_elapsed > 0 else 0.0,
+            "received_rate": round(received / offered_elapsed, 1) if offered_elapsed > 0 else 0.0,
+            "keepup_ratio": round(received / offered, 3) if offered else 0.0,
+            "queue_before": before["queue_size"],
+            "queue_after": after["queue_size"],
+            "queue_growth_per_second": round((after["queue_size"] - before["queue_size"]) / window, 1) if window > 0 else 0.0,
+            "errors": outcome["errors"],
+            "rejected": outcome["rejected"],
+            "latency_ms": {
+                "p50": round(self._percentile(latencies, 0.50) * 1000, 2),
+                "p95": round(self._percentile(latencies, 0.95) * 1000, 2),
+                "p99": round(self._percentile(latencies, 0.99) * 1000, 2),
+                "max": round(max(latencies, default=0.0) * 1000, 2)
+            }
+        }
+    
+    def run_capacity_sweep(
+        self,
+        start_rate: float,
+        step_rate: float,
+        max_rate: float,
+        step_seconds: float,
+        batch_size: int
+    ) -> Dict[str, Any]:
+        """
+        Cari throughput maksimum yang masih bisa diikuti aggregator
+        
+        Offered load dinaikkan per step. Sebuah step dianggap saturated jika
+        counter received (/stats) bertambah < SWEEP_KEEPUP_RATIO x event yang dikirim, queue
+        tumbuh, atau ada request yang ditolak/gagal. Knee = step terakhir yang
+        belum saturated; sweep berhenti SWEEP_STEPS_PAST_KNEE step setelahnya.
+        
+        Returns:
+            Report JSON (config, steps, knee)
+        """
+        logger.info("=" * 60)
+        logger.info(f"Capacity sweep: {start_rate:.0f} -> {max_rate:.0f} events/s, step {step_rate:.0f}, {step_seconds}s/step")
+        logger.info("=" * 60)
+        
+        steps = []
+        knee = None
+        saturated_steps = 0
+        rate = start_rate
+        with ThreadPoolExecutor(max_workers=SWEEP_CONCURRENCY, thread_name_prefix="sweep") as pool:
+            while rate <= max_rate and saturated_steps <= SWEEP_STEPS_PAST_KNEE:
+                step = self._run_sweep_step(rate, step_seconds, batch_size, pool)
+                # Queue boleh berfluktuasi sebesar satu batch per detik
+                step["saturated"] = (
+                    step["keepup_ratio"] < SWEEP_KEEPUP_RATIO
+                    or step["queue_growth_per_second"] > batch_size
+                    or step["errors"] > 0
+                    or step["rejected"] > 0
+                )
+                steps.append(step)
+                logger.info(
+                    f"[sweep] offered {step['offered_rate']:>8.1f} ev/s, received {step['received_rate']:>8.1f} ev/s, "
+                    f"queue {step['queue_after']:>7} ({step['queue_growth_per_second']:+.1f}/s), "
+                    f"p95 {step['latency_ms']['p95']:.1f} ms{' SATURATED' if step['saturated'] else ''}"
+                )
+                
+                if step["saturated"]:
+                    saturated_steps += 1
+                elif saturated_steps == 0:
+                    knee = step
+                rate += step_rate
+        
+        return {
+            "benchmark": "capacity-sweep",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "aggregator_url": self.aggregator_url,
+            "config": {
+                "start_rate": start_rate,
+                "step_rate": step_rate,
+                "max_rate": max_rate,
+                "step_seconds": step_seconds,
+                "batch_size": batch_size,
+                "duplicate_rate": DUPLICATE_RATE,
+                "compression": self.compression,
+                "keepup_ratio": SWEEP_KEEPUP_RATIO,
+                "concurrency": SWEEP_CONCURRENCY
+            },
+            "knee": {
+                "max_sustainable_rate": knee["received_rate"] if knee else None,
+                "offered_rate": knee["offered_rate"] if knee else None,
+                "latency_ms": knee["latency_ms"] if knee else None,
+                "saturated_at": next((s["offered_rate"] for s in steps if s["saturated"]), None)
+            },
+            "steps": steps
+        }
+    
     def fetch_aggregator_stats(self):
         """Fetch dan tampilkan statistik dari aggregator"""
         try:
@@ -378,6 +712,22 @@ def main():
     # Wait additional time untuk database initialization
     time.sleep(5)
     
+    if PUBLISHER_MODE == "compression-bench":
+        results = publisher.run_compression_benchmark(BENCH_BATCH_SIZES, BENCH_EVENTS_PER_RUN)
+        print(json.dumps({"benchmark": "compression", "results": results}, indent=2))
+        return 0
+    
+    if PUBLISHER_MODE == "capacity-sweep":
+        report = publisher.run_capacity_sweep(
+            SWEEP_START_RATE, SWEEP_STEP_RATE, SWEEP_MAX_RATE, SWEEP_STEP_SECONDS, BATCH_SIZE
+        )
+        if SWEEP_REPORT_PATH:
+            with open(SWEEP_REPORT_PATH, "w") as f:
+                json.dump(report, f, indent=2)
+            logger.info(f"Sweep report written to {SWEEP_REPORT_PATH}")
+        print(json.dumps(report, indent=2))
+        return 0
+    
     # Run simulation
     try:
         publisher.run_simulation(
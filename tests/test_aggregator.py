@@ -1,21 +1,30 @@
 """
 Unit & Integration Tests untuk Log Aggregator System
-Total: 18 tests mencakup deduplication, persistensi, konkurensi, dan validasi
+Mencakup deduplication, persistensi, konkurensi, validasi, dan fitur performa
 """
 import pytest
 import asyncio
 import json
 import time
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any
 import uuid
 import concurrent.futures
+import gzip
+
+import importlib.util
+import os
+import random
+import sys
 
 import httpx
+import redis.asyncio as redis
 from faker import Faker
 
 # Test configuration
 AGGREGATOR_URL = "http://localhost:8080"
+REDIS_URL = "redis://localhost:6379"
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")  # token operator; test yang butuh admin di-skip jika kosong
 TIMEOUT = 30.0
 
 fake = Faker()
@@ -52,6 +61,23 @@ async def client():
     async with httpx.AsyncClient(timeout=TIMEOUT) as client:
         yield client
 
+@pytest.fixture(scope="module")
+def aggregator():
+    """Modul aggregator untuk unit test komponen (tanpa service berjalan)"""
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "aggregator"))
+    return pytest.importorskip("main")
+
+@pytest.fixture(scope="module")
+def publisher():
+    """Modul publisher (EventGenerator) untuk unit test komponen"""
+    pytest.importorskip("requests")
+    directory = os.path.join(os.path.dirname(__file__), "..", "publisher")
+    sys.path.append(directory)  # untuk `from client import ...`; tidak menutupi main aggregator
+    spec = importlib.util.spec_from_file_location("publisher_main", os.path.join(directory, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
 @pytest.fixture
 async def wait_for_aggregator(client):
     """Wait untuk aggregator service siap"""
@@ -543,6 +569,1059 @@ async def test_18_large_batch_processing(client, event_template):
     
     print(f"✓ Test 18: Large batch of {batch_size} events accepted")
 
+# ============================================================================
+# TEST 19+: PERFORMANCE FEATURES
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_19_recent_events_served_after_commit(client, event_template):
+    """Test 19: Event unik terbaru harus langsung muncul di GET /events (recent buffer)"""
+    topic = f"recent.buffer.{uuid.uuid4().hex[:8]}"
+    event = event_template.copy()
+    event["event_id"] = f"recent-{uuid.uuid4()}"
+    event["topic"] = topic
+    event["payload"] = {"marker": "recent"}
+    
+    await client.post(f"{AGGREGATOR_URL}/publish", json={"events": [event]})
+    await asyncio.sleep(2)
+    
+    response = await client.get(f"{AGGREGATOR_URL}/events?topic={topic}&limit=1")
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert len(data) == 1
+    assert data[0]["event_id"] == event["event_id"]
+    assert data[0]["payload"] == {"marker": "recent"}
+    print("✓ Test 19: Recent event served from buffer")
+
+@pytest.mark.asyncio
+async def test_20_live_tail_stream(client, event_template):
+    """Test 20: GET /events/stream harus push event unik yang baru di-commit"""
+    topic = f"live.tail.{uuid.uuid4().hex[:8]}"
+    event = event_template.copy()
+    event["event_id"] = f"tail-{uuid.uuid4()}"
+    event["topic"] = topic
+    
+    async with client.stream("GET", f"{AGGREGATOR_URL}/events/stream?topic={topic}") as stream:
+        assert stream.status_code == 200
+        lines = stream.aiter_lines()
+        assert (await lines.__anext__()).startswith(": connected")
+        
+        await client.post(f"{AGGREGATOR_URL}/publish", json={"events": [event]})
+        
+        async def next_event():
+            async for line in lines:
+                if line.startswith("data: "):
+                    return json.loads(line[len("data: "):])
+        
+        received = await asyncio.wait_for(next_event(), timeout=10)
+    
+    assert received["event_id"] == event["event_id"]
+    assert received["topic"] == topic
+    print("✓ Test 20: Live tail delivered committed event")
+
+@pytest.mark.asyncio
+async def test_21_stats_timeseries(client, event_template):
+    """Test 21: GET /stats/timeseries harus return bucket unik & duplikat per topic"""
+    topic = f"timeseries.{uuid.uuid4().hex[:8]}"
+    event = event_template.copy()
+    event["event_id"] = f"ts-{uuid.uuid4()}"
+    event["topic"] = topic
+    
+    # 1 unik + 1 duplikat
+    await client.post(f"{AGGREGATOR_URL}/publish", json={"events": [event, event]})
+    await asyncio.sleep(8)  # tunggu consumer + rollup flush
+    
+    response = await client.get(f"{AGGREGATOR_URL}/stats/timeseries?granularity=minute&topic={topic}")
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert data["granularity"] == "minute"
+    assert sum(p["unique"] for p in data["points"]) == 1
+    assert sum(p["duplicate"] for p in data["points"]) == 1
+    assert all(p["topic"] == topic for p in data["points"])
+    print("✓ Test 21: Timeseries rollup returned")
+
+@pytest.mark.asyncio
+async def test_22_consumers_endpoint(client):
+    """Test 22: GET /consumers harus menampilkan jumlah worker dalam batas autoscaler"""
+    response = await client.get(f"{AGGREGATOR_URL}/consumers")
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert data["min_workers"] <= data["workers"] <= data["max_workers"]
+    assert "commit_latency_ms" in data["metrics"]
+    assert isinstance(data["decisions"], list)
+    print(f"✓ Test 22: {data['workers']} consumer workers running")
+
+@pytest.mark.asyncio
+async def test_23_publish_gzip_compressed(client, batch_events):
+    """Test 23: /publish harus menerima body dengan Content-Encoding gzip"""
+    body = gzip.compress(json.dumps({"events": batch_events}).encode("utf-8"))
+    
+    response = await client.post(
+        f"{AGGREGATOR_URL}/publish",
+        content=body,
+        headers={"Content-Type": "application/json", "Content-Encoding": "gzip"}
+    )
+    assert response.status_code == 202
+    assert response.json()["queued"] == len(batch_events)
+    
+    # Body gzip yang rusak harus ditolak
+    response = await client.post(
+        f"{AGGREGATOR_URL}/publish",
+        content=b"not-gzip",
+        headers={"Content-Type": "application/json", "Content-Encoding": "gzip"}
+    )
+    assert response.status_code == 400
+    print("✓ Test 23: Gzip-compressed publish accepted")
+
+@pytest.mark.asyncio
+async def test_24_idempotency_key_replay(client, batch_events):
+    """Test 24: Retry /publish dengan Idempotency-Key yang sama tidak boleh di-enqueue ulang"""
+    headers = {"Idempotency-Key": f"test-{uuid.uuid4()}"}
+    
+    initial_stats = (await client.get(f"{AGGREGATOR_URL}/stats")).json()
+    
+    first = await client.post(f"{AGGREGATOR_URL}/publish", json={"events": batch_events}, headers=headers)
+    second = await client.post(f"{AGGREGATOR_URL}/publish", json={"events": batch_events}, headers=headers)
+    assert first.status_code == 202
+    assert second.status_code == 202
+    assert second.headers.get("Idempotent-Replayed") == "true"
+    assert second.json() == first.json()
+    
+    # Key sama dengan batch berbeda harus ditolak
+    other = [dict(batch_events[0], event_id=f"other-{uuid.uuid4()}")]
+    conflict = await client.post(f"{AGGREGATOR_URL}/publish", json={"events": other}, headers=headers)
+    assert conflict.status_code == 422
+    
+    final_stats = (await client.get(f"{AGGREGATOR_URL}/stats")).json()
+    assert final_stats["requeues_avoided"] >= initial_stats["requeues_avoided"] + len(batch_events)
+    print("✓ Test 24: Idempotent publish replay acknowledged without re-queue")
+
+@pytest.mark.asyncio
+async def test_25_sync_ingest_per_event_status(client, event_template):
+    """Test 25: POST /publish/sync harus return status processed/duplicate per event"""
+    event = event_template.copy()
+    event["event_id"] = f"sync-{uuid.uuid4()}"
+    event["topic"] = "sync.ingest.test"
+    
+    # Event yang sama dua kali dalam satu request
+    response = await client.post(f"{AGGREGATOR_URL}/publish/sync", json={"events": [event, event]})
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert [r["status"] for r in data["results"]] == ["processed", "duplicate"]
+    assert data["processed"] == 1
+    assert data["duplicates"] == 1
+    
+    # Request berikutnya: sudah duplikat
+    response = await client.post(f"{AGGREGATOR_URL}/publish/sync", json={"events": [event]})
+    assert response.json()["results"][0]["status"] == "duplicate"
+    print("✓ Test 25: Sync ingest returned per-event dedup status")
+
+@pytest.mark.asyncio
+async def test_26_bulk_lookup(client, event_template):
+    """Test 26: POST /events/lookup harus membedakan pasangan yang sudah ada dan yang belum"""
+    event = event_template.copy()
+    event["event_id"] = f"lookup-{uuid.uuid4()}"
+    event["topic"] = "lookup.test"
+    await client.post(f"{AGGREGATOR_URL}/publish/sync", json={"events": [event]})
+    
+    missing = {"topic": "lookup.test", "event_id": f"missing-{uuid.uuid4()}"}
+    response = await client.post(
+        f"{AGGREGATOR_URL}/events/lookup",
+        json={
+            "keys": [{"topic": event["topic"], "event_id": event["event_id"]}, missing],
+            "include_payload": True
+        }
+    )
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert data["found"] == 1
+    assert data["missing"] == 1
+    assert data["existing"][0]["event_id"] == event["event_id"]
+    assert data["existing"][0]["payload"] == event["payload"]
+    assert data["missing_keys"] == [missing]
+    print("✓ Test 26: Bulk lookup split existing and missing pairs")
+
+@pytest.mark.asyncio
+async def test_27_stats_sketches(client, event_template):
+    """Test 27: GET /stats/sketches harus return distinct estimate & heavy hitters per source"""
+    source = f"sketch-source-{uuid.uuid4().hex[:8]}"
+    events = []
+    for i in range(20):
+        event = event_template.copy()
+        event["event_id"] = f"sketch-{uuid.uuid4()}"
+        event["source"] = source
+        events.append(event)
+    
+    # 20 event unik + 20 duplikat dari source yang sama
+    await client.post(f"{AGGREGATOR_URL}/publish/sync", json={"events": events + events})
+    
+    response = await client.get(f"{AGGREGATOR_URL}/stats/sketches")
+    assert response.status_code == 200
+    
+    data = response.json()
+    # HyperLogLog: estimasi kecil praktis eksak (linear counting)
+    assert 18 <= data["distinct_events"]["source"][source] <= 22
+    assert "top_duplicate" in data and "source" in data["top_duplicate"]
+    print("✓ Test 27: Approximate sketches served")
+
+@pytest.mark.asyncio
+async def test_28_read_routing_info(client):
+    """Test 28: /health harus menampilkan routing read engine terpisah dari ingest"""
+    await client.get(f"{AGGREGATOR_URL}/stats")
+    
+    response = await client.get(f"{AGGREGATOR_URL}/health")
+    data = response.json()
+    
+    assert "reads" in data
+    assert data["reads"]["target"] in ("primary", "replica")
+    assert sum(data["reads"]["routed"].values()) >= 1
+    print("✓ Test 28: Read routing reported")
+
+@pytest.mark.asyncio
+async def test_29_stats_durability_guarantees(client):
+    """Test 29: /stats harus menyatakan durability tier & jaminannya"""
+    response = await client.get(f"{AGGREGATOR_URL}/stats")
+    data = response.json()
+    
+    durability = data["durability"]
+    assert durability["default"] in ("strict", "relaxed", "ephemeral")
+    assert set(durability["guarantees"]) == {"strict", "relaxed", "ephemeral"}
+    print("✓ Test 29: Durability guarantees reported")
+
+@pytest.mark.asyncio
+async def test_30_outbox_delivery(client, event_template):
+    """Test 30: event topic outbox.test.* terkirim ke stream Redis subscriber outbox-test"""
+    response = await client.get(f"{AGGREGATOR_URL}/outbox")
+    assert response.status_code == 200
+    data = response.json()
+    dispatchers = data["shards"] if "shards" in data else [data]
+    for dispatcher in dispatchers:
+        subscriber = dispatcher["subscribers"]["outbox-test"]
+        assert "offset" in subscriber and "delivered" in subscriber
+    
+    topic = f"outbox.test.{uuid.uuid4().hex[:8]}"
+    events = []
+    for i in range(3):
+        event = event_template.copy()
+        event["topic"] = topic
+        event["event_id"] = f"outbox-{uuid.uuid4()}"
+        events.append(event)
+    response = await client.post(f"{AGGREGATOR_URL}/publish/sync", json={"events": events})
+    assert response.status_code == 200
+    
+    broker = redis.from_url(REDIS_URL)
+    stream = f"events:{topic}"
+    try:
+        delivered = []
+        for _ in range(50):
+            entries = await broker.xrange(stream)
+            delivered = [json.loads(fields[b"event"])["event_id"] for _, fields in entries]
+            if len(delivered) >= len(events):
+                break
+            await asyncio.sleep(0.2)
+        assert sorted(delivered) == sorted(e["event_id"] for e in events)
+    finally:
+        await broker.delete(stream)
+        await broker.close()
+    print("✓ Test 30: Outbox delivers events to subscriber stream")
+
+@pytest.mark.asyncio
+async def test_31_payload_schema_validation(client, event_template):
+    """Test 31: Payload yang tidak sesuai schema topic harus ditolak di /publish"""
+    schemas = (await client.get(f"{AGGREGATOR_URL}/schemas")).json()
+    assert schemas["mode"] == "reject"  # diset docker-compose.yml
+    
+    # Schema bawaan order.* berlaku tanpa registrasi
+    valid = event_template.copy()
+    valid["topic"] = f"order.schema-test-{uuid.uuid4().hex[:8]}"
+    valid["event_id"] = f"schema-{uuid.uuid4()}"
+    valid["payload"] = {"order_id": "ORD-12345", "customer_id": "user_1234", "amount": 10.5, "items": 1, "currency": "USD"}
+    
+    invalid = valid.copy()
+    invalid["event_id"] = f"schema-{uuid.uuid4()}"
+    invalid["payload"] = {**valid["payload"], "amount": "ten"}
+    
+    response = await client.post(f"{AGGREGATOR_URL}/publish", json={"events": [valid]})
+    assert response.status_code == 202
+    
+    response = await client.post(f"{AGGREGATOR_URL}/publish", json={"events": [valid, invalid]})
+    assert response.status_code == 422
+    assert response.json()["detail"]["errors"][0]["index"] == 1
+    
+    topic = f"schema.test.{uuid.uuid4().hex[:8]}"
+    schema = {
+        "type": "object",
+        "required": ["amount"],
+        "properties": {"amount": {"type": "number", "minimum": 0}}
+    }
+    response = await client.put(f"{AGGREGATOR_URL}/schemas/{topic}", json=schema)
+    assert response.status_code in (403, 404)  # registrasi schema butuh admin aktif + token
+    if not ADMIN_TOKEN:
+        pytest.skip("ADMIN_TOKEN tidak diset: registrasi schema butuh ADMIN_ENABLED=true + ADMIN_TOKEN")
+    
+    response = await client.put(
+        f"{AGGREGATOR_URL}/schemas/{topic}", json=schema, headers={"X-Admin-Token": ADMIN_TOKEN}
+    )
+    assert response.status_code == 201
+    assert response.json()["version"] == 1
+    
+    registered = {**valid, "topic": topic, "event_id": f"schema-{uuid.uuid4()}", "payload": {"amount": "ten"}}
+    response = await client.post(f"{AGGREGATOR_URL}/publish", json={"events": [registered]})
+    assert response.status_code == 422
+    
+    schemas = (await client.get(f"{AGGREGATOR_URL}/schemas")).json()
+    assert topic in schemas["schemas"]
+    print("✓ Test 31: Payload schema enforced")
+
+@pytest.mark.asyncio
+async def test_32_sharded_lookup_and_dedup(client, event_template):
+    """Test 32: Event tersebar di semua shard tetap bisa di-lookup dan dedup tetap berlaku"""
+    events = []
+    for i in range(20):
+        event = event_template.copy()
+        event["topic"] = "shard.test"
+        event["event_id"] = f"shard-{uuid.uuid4()}"
+        events.append(event)
+    
+    response = await client.post(f"{AGGREGATOR_URL}/publish/sync", json={"events": events})
+    assert response.status_code == 200
+    response = await client.post(f"{AGGREGATOR_URL}/publish/sync", json={"events": events})
+    assert response.json()["duplicates"] == len(events)
+    
+    response = await client.post(
+        f"{AGGREGATOR_URL}/events/lookup",
+        json={"keys": [{"topic": e["topic"], "event_id": e["event_id"]} for e in events]}
+    )
+    assert response.json()["found"] == len(events)
+    
+    health = (await client.get(f"{AGGREGATOR_URL}/health")).json()
+    assert all(status == "connected" for status in health.get("shards", ["connected"]))
+    print("✓ Test 32: Sharded lookup & dedup")
+
+@pytest.mark.asyncio
+async def test_33_client_library_batching(client, event_template):
+    """Test 33: AggregatorClient mengirim event per batch dan melaporkan hasil lewat callback"""
+    import importlib.util
+    from pathlib import Path
+    
+    spec = importlib.util.spec_from_file_location(
+        "aggregator_client", Path(__file__).resolve().parent.parent / "publisher" / "client.py"
+    )
+    client_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(client_module)
+    
+    results = {"delivered": 0, "failed": 0}
+    
+    def on_delivery(events, error):
+        results["failed" if error else "delivered"] += len(events)
+    
+    events = []
+    for i in range(50):
+        event = event_template.copy()
+        event["topic"] = "client.test"
+        event["event_id"] = f"client-{uuid.uuid4()}"
+        events.append(event)
+    
+    async with client_module.AggregatorClient(
+        AGGREGATOR_URL, batch_size=20, linger_ms=10, on_delivery=on_delivery
+    ) as aggregator_client:
+        for event in events:
+            assert await aggregator_client.send_async(event)
+        assert await aggregator_client.flush_async(timeout=TIMEOUT)
+        assert aggregator_client.stats["batches"] >= 3
+    
+    assert results == {"delivered": 50, "failed": 0}
+    
+    await asyncio.sleep(2)
+    response = await client.post(
+        f"{AGGREGATOR_URL}/events/lookup",
+        json={"keys": [{"topic": e["topic"], "event_id": e["event_id"]} for e in events]}
+    )
+    assert response.json()["found"] == len(events)
+    print("✓ Test 33: Client library batching")
+
+@pytest.mark.asyncio
+async def test_34_events_time_range_and_export(client, event_template):
+    """Test 34: GET /events dengan rentang waktu dan export NDJSON (tabel panas + arsip)"""
+    topic = f"export.test.{uuid.uuid4().hex[:8]}"
+    events = []
+    for i in range(5):
+        event = event_template.copy()
+        event["topic"] = topic
+        event["event_id"] = f"export-{uuid.uuid4()}"
+        events.append(event)
+    
+    since = datetime.now(timezone.utc).isoformat()
+    response = await client.post(f"{AGGREGATOR_URL}/publish/sync", json={"events": events})
+    assert response.status_code == 200
+    
+    response = await client.get(f"{AGGREGATOR_URL}/events", params={"topic": topic, "since": since})
+    assert response.status_code == 200
+    assert {e["event_id"] for e in response.json()} == {e["event_id"] for e in events}
+    
+    response = await client.get(
+        f"{AGGREGATOR_URL}/events", params={"topic": topic, "until": "2000-01-01T00:00:00Z"}
+    )
+    assert response.json() == []
+    
+    response = await client.get(f"{AGGREGATOR_URL}/events/export", params={"topic": topic})
+    assert response.status_code == 200
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(e["event_id"] for e in exported) == sorted(e["event_id"] for e in events)
+    print("✓ Test 34: Time range query & export")
+
+@pytest.mark.asyncio
+async def test_35_liveness_readiness_probes(client):
+    """Test 35: /live dan /ready dijawab dari health state, /health menampilkan durasi startup"""
+    response = await client.get(f"{AGGREGATOR_URL}/live")
+    assert response.status_code == 200
+    assert response.json()["status"] == "alive"
+    
+    response = await client.get(f"{AGGREGATOR_URL}/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+    
+    health = (await client.get(f"{AGGREGATOR_URL}/health")).json()
+    startup = health["health"]["startup_seconds"]
+    assert "database" in startup
+    assert startup["total"] >= startup["database"]
+    assert health["health"]["checked_age_seconds"] < 10
+    print("✓ Test 35: Liveness & readiness probes")
+
+@pytest.mark.asyncio
+async def test_36_consumers_not_draining(client, event_template):
+    """Test 36: instance yang sedang berjalan tidak dalam mode drain dan menerima publish"""
+    consumers = (await client.get(f"{AGGREGATOR_URL}/consumers")).json()
+    assert consumers["draining"] is False
+    assert consumers["workers"] >= 1
+    
+    response = await client.post(f"{AGGREGATOR_URL}/publish", json={"events": [event_template]})
+    assert response.status_code == 202
+    assert "Retry-After" not in response.headers
+    print("✓ Test 36: Consumers accepting work (not draining)")
+
+# ============================================================================
+# UNIT TEST KOMPONEN (tanpa service berjalan)
+# ============================================================================
+
+@pytest.mark.unit
+def test_37_name_dictionary_negative_cache(aggregator, monkeypatch, tmp_path):
+    """Test 37: nama tak dikenal di-cache negatif, id tak dikenal jadi placeholder"""
+    from sqlalchemy import create_engine, event as sa_event, text
+    
+    engine = create_engine(f"sqlite:///{tmp_path / 'dictionary.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE topics (id INTEGER PRIMARY KEY, name TEXT UNIQUE)"))
+        conn.execute(text("INSERT INTO topics (id, name) VALUES (1, 'known')"))
+    queries = []
+    sa_event.listen(engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+    monkeypatch.setitem(aggregator.app_state, "engine", engine)
+    
+    topics = aggregator.NameDictionary(aggregator.Topic)
+    assert asyncio.run(topics.lookup_async("known")) == 1
+    assert topics.lookup("missing") is None
+    assert topics.lookup("missing") is None
+    assert asyncio.run(topics.lookup_async("missing")) is None
+    assert len(queries) == 2  # "known" sekali, "missing" sekali lalu dari cache negatif
+    
+    assert topics.name_for(1) == "known"
+    assert topics.name_for(99) == "<unknown:99>"
+    print("✓ Test 37: Name dictionary negative cache")
+
+class FakeRedisList:
+    """Redis list minimal di memori (RPUSH/LPUSH/BLPOP/LLEN) yang bisa dibuat 'down'"""
+    
+    def __init__(self):
+        self.items: List[str] = []
+        self.down = False
+    
+    def _check(self):
+        if self.down:
+            raise ConnectionError("broker unavailable")
+    
+    def pipeline(self, transaction: bool = True):
+        commands = []
+        fake = self
+        
+        class Pipeline:
+            def rpush(self, key, value):
+                commands.append(value)
+            
+            async def execute(self):
+                fake._check()
+                fake.items.extend(commands)
+        
+        return Pipeline()
+    
+    async def lpush(self, key, *values):
+        self._check()
+        for value in values:
+            self.items.insert(0, value)
+    
+    async def blpop(self, key, timeout=0):
+        self._check()
+        if not self.items:
+            await asyncio.sleep(min(timeout, 0.05))
+            return None
+        return key, self.items.pop(0)
+    
+    async def llen(self, key):
+        return len(self.items)
+
+def make_events(aggregator, count: int, topic: str = "test.unit") -> list:
+    return [
+        aggregator.Event(
+            topic=topic,
+            event_id=f"unit-{i}",
+            timestamp=datetime.now(timezone.utc).isoformat(),
+            source="test-runner",
+            payload={"index": i}
+        )
+        for i in range(count)
+    ]
+
+@pytest.mark.unit
+async def test_38_spool_on_broker_failure_and_drain(aggregator, monkeypatch, tmp_path):
+    """Test 38: batch masuk spool saat Redis gagal, lalu di-drain berurutan setelah pulih"""
+    broker = FakeRedisList()
+    spool = aggregator.PublishSpool(str(tmp_path / "publish.spool"), 1024 * 1024, "always")
+    spool.open()
+    monkeypatch.setitem(aggregator.app_state, "queue", aggregator.RedisListQueue(broker))
+    monkeypatch.setitem(aggregator.app_state, "spool", spool)
+    events = make_events(aggregator, 6)
+    
+    broker.down = True
+    assert (await aggregator.enqueue_batch(events[:3]))["spooled"] is True
+    broker.down = False
+    # Spool belum kosong: batch berikutnya tetap ke spool agar urutan terjaga
+    assert (await aggregator.enqueue_batch(events[3:]))["spooled"] is True
+    assert spool.pending_batches == 2 and broker.items == []
+    
+    drainer = asyncio.create_task(aggregator.spool_drainer())
+    for _ in range(50):
+        if spool.pending_batches == 0:
+            break
+        await asyncio.sleep(0.05)
+    drainer.cancel()
+    await asyncio.gather(drainer, return_exceptions=True)
+    spool.close()
+    
+    assert [json.loads(item)["event_id"] for item in broker.items] == [e.event_id for e in events]
+    print("✓ Test 38: Spool on broker failure, drain on recovery")
+
+@pytest.mark.unit
+def test_39_spool_corrupt_record_discarded(aggregator, tmp_path):
+    """Test 39: record spool yang rusak dibuang tanpa membuat drain loop error"""
+    spool = aggregator.PublishSpool(str(tmp_path / "publish.spool"), 64 * 1024, "always")
+    spool.open()
+    spool.append(['{"a": 1}'])
+    spool.append(['{"b": 2}'])
+    # Rusak satu byte data record pertama (CRC tidak cocok)
+    offset = spool.read_offset + spool.RECORD.size
+    spool._mmap[offset:offset + 1] = b"X"
+    
+    assert spool.peek() is None
+    assert spool.pending_batches == 0
+    spool.pop()  # tidak raise meski kosong/rusak
+    assert spool.append(['{"c": 3}'])
+    assert spool.peek() == ['{"c": 3}']
+    spool.close()
+    print("✓ Test 39: Corrupt spool record discarded")
+
+@pytest.mark.unit
+async def test_40_memory_queue_overflow_refill(aggregator, tmp_path):
+    """Test 40: QUEUE_BACKEND=memory meluap ke overflow spool dan refill sesuai urutan"""
+    events = make_events(aggregator, 8)
+    
+    bounded = aggregator.InProcessQueue(maxsize=3)
+    await bounded.push(events[:3])
+    with pytest.raises(aggregator.QueueFullError):
+        await bounded.push(events[3:4])
+    
+    overflow = aggregator.PublishSpool(str(tmp_path / "overflow.spool"), 1024 * 1024, "always")
+    overflow.open()
+    queue = aggregator.InProcessQueue(maxsize=3, overflow=overflow)
+    await queue.push(events[:2])
+    await queue.push(events[2:5])  # tidak muat: seluruh batch ke overflow
+    await queue.push(events[5:])  # overflow belum kosong: tetap ke overflow
+    assert await queue.size() == 2
+    assert overflow.pending_batches == 2
+    
+    popped = []
+    while (event := await queue.pop(timeout=0.1)) is not None:
+        popped.append(event.event_id)
+    assert popped == [e.event_id for e in events]
+    assert overflow.pending_batches == 0
+    overflow.close()
+    print("✓ Test 40: Memory queue overflow refill")
+
+@pytest.mark.unit
+async def test_41_consume_event_metrics_all_tiers(aggregator, monkeypatch):
+    """Test 41: tier relaxed melaporkan duplikat apa adanya dan tetap mengisi metrik consumer"""
+    class FakeCommitter:
+        async def submit(self, events, synchronous=True):
+            return ["duplicate"]
+    
+    metrics = aggregator.ConsumerMetrics()
+    monkeypatch.setitem(aggregator.app_state, "durability", aggregator.DurabilityPolicy("test.*=relaxed"))
+    monkeypatch.setitem(aggregator.app_state, "group_committer", FakeCommitter())
+    monkeypatch.setitem(aggregator.app_state, "consumer_metrics", metrics)
+    
+    success, message = await aggregator.consume_event(make_events(aggregator, 1, topic="test.relaxed")[0])
+    assert (success, message) == (True, "duplicate")
+    assert metrics.snapshot()["processed"] == 1
+    print("✓ Test 41: Consumer metrics for every tier")
+
+@pytest.mark.unit
+async def test_42_idempotency_eviction_skips_in_flight(aggregator):
+    """Test 42: key yang masih in-flight tidak menghalangi eviction key lain"""
+    store = aggregator.IdempotencyStore(max_keys=2, ttl_seconds=3600)
+    assert await store.begin("in-flight", "fp") is None
+    for i in range(10):
+        key = f"done-{i}"
+        assert await store.begin(key, "fp") is None
+        store.complete(key, {"status": "accepted"})
+    
+    assert len(store._entries) <= 3
+    assert "in-flight" in store._entries
+    assert "done-9" in store._entries
+    print("✓ Test 42: Idempotency eviction skips in-flight keys")
+
+@pytest.mark.unit
+def test_43_heavy_hitters_roundtrip_dimensions(aggregator):
+    """Test 43: sketch heavy hitters dibaca ulang dengan width/depth yang tersimpan"""
+    sketch = aggregator.HeavyHitters(width=64, depth=3, k=5)
+    for name, count in (("alpha", 50), ("beta", 20), ("gamma", 5)):
+        sketch.add(name, count)
+    
+    restored = aggregator.HeavyHitters.from_bytes(sketch.to_bytes(), list(sketch.candidates))
+    assert (restored.width, restored.depth) == (64, 3)
+    assert restored.estimate("alpha") == sketch.estimate("alpha")
+    assert restored.top()[0] == {"name": "alpha", "count": 50}
+    
+    # Digabung ke sketch dengan dimensi default tanpa merusak estimasi
+    current = aggregator.HeavyHitters()
+    current.merge(restored)
+    assert current.estimate("alpha") >= 50
+    assert current.top()[0]["name"] == "alpha"
+    print("✓ Test 43: Heavy hitters roundtrip keeps dimensions")
+
+@pytest.mark.unit
+async def test_44_admin_endpoints_require_token(aggregator, monkeypatch):
+    """Test 44: /admin hanya aktif dengan ADMIN_ENABLED + ADMIN_TOKEN, dan token wajib cocok"""
+    transport = httpx.ASGITransport(app=aggregator.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://aggregator") as admin:
+        monkeypatch.setattr(aggregator, "ADMIN_ENABLED", False)
+        monkeypatch.setattr(aggregator, "ADMIN_TOKEN", "secret")
+        assert (await admin.get("/admin/tasks", headers={"X-Admin-Token": "secret"})).status_code == 404
+        
+        # Enabled tanpa token tetap nonaktif (tidak pernah terbuka tanpa autentikasi)
+        monkeypatch.setattr(aggregator, "ADMIN_ENABLED", True)
+        monkeypatch.setattr(aggregator, "ADMIN_TOKEN", "")
+        assert (await admin.get("/admin/tasks")).status_code == 404
+        
+        monkeypatch.setattr(aggregator, "ADMIN_TOKEN", "secret")
+        assert (await admin.get("/admin/tasks")).status_code == 403
+        assert (await admin.get("/admin/tasks", headers={"X-Admin-Token": "wrong"})).status_code == 403
+        
+        response = await admin.get("/admin/tasks", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 200
+        assert response.json()["count"] >= 1
+        
+        response = await admin.post("/admin/memory/snapshot", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 200
+        response = await admin.get("/admin/memory/diff", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 200
+        response = await admin.delete("/admin/memory", headers={"X-Admin-Token": "secret"})
+        assert response.json() == {"tracing": False}
+    print("✓ Test 44: Admin endpoints require token")
+
+class EmptyReadRouter:
+    """ReadRouter pengganti: tabel panas kosong di semua shard"""
+    
+    async def run_all(self, endpoint, query):
+        return [[]]
+    
+    async def run_shards(self, endpoint, queries):
+        return {shard: [] for shard in queries}
+
+@pytest.mark.unit
+async def test_45_archive_read_back(aggregator, monkeypatch, tmp_path):
+    """Test 45: event yang diarsip terbaca kembali lewat /events (since/until) dan /events/export"""
+    topic = f"archive.test.{uuid.uuid4().hex[:8]}"
+    archive = aggregator.ColumnarArchive(str(tmp_path), 2, 3)
+    base = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=10)
+    payloads = [{"seq": i, "text": "it's \"quoted\"", "tags": ["a", None, True]} for i in range(4)]
+    rows = [{
+        "id": i + 1,
+        "key_hash": aggregator.dedup_key_hash(topic, f"arch-{i}"),
+        "event_id": f"arch-{i}",
+        "timestamp": base + timedelta(minutes=i),
+        "source": "archive-test",
+        "payload": json.dumps(payload),
+        "processed_at": base + timedelta(minutes=i)
+    } for i, payload in enumerate(payloads)]
+    rows[0]["payload"] = str(payloads[0])  # row lama yang masih ditulis dengan str()
+    archive.write(topic, 0, rows)
+    archive.mark_archived(len(rows), rows[-1]["processed_at"])
+    
+    topics = aggregator.NameDictionary(aggregator.Topic)
+    topics._remember(topic, 1)
+    monkeypatch.setitem(aggregator.app_state, "archive", archive)
+    monkeypatch.setitem(aggregator.app_state, "shards", aggregator.ShardSet([]))
+    monkeypatch.setitem(aggregator.app_state, "reads", EmptyReadRouter())
+    monkeypatch.setitem(aggregator.app_state, "topic_ids", topics)
+    
+    transport = httpx.ASGITransport(app=aggregator.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://aggregator") as reader:
+        response = await reader.get("/events", params={
+            "topic": topic,
+            "since": base.isoformat(),
+            "until": (base + timedelta(minutes=3)).isoformat()
+        })
+        assert response.status_code == 200
+        events = response.json()
+        assert [e["event_id"] for e in events] == ["arch-2", "arch-1", "arch-0"]
+        assert [e["payload"] for e in events] == payloads[2::-1]
+    
+        response = await reader.get("/events/export", params={"topic": topic})
+        assert response.status_code == 200
+        exported = [json.loads(line) for line in response.text.splitlines()]
+        assert [e["event_id"] for e in exported] == [f"arch-{i}" for i in range(4)]
+        assert [e["payload"] for e in exported] == payloads
+        assert all(e["topic"] == topic and e["source"] == "archive-test" for e in exported)
+    print("✓ Test 45: Archived events read back")
+
+class SlowPopRedisList(FakeRedisList):
+    """BLPOP yang sudah mengambil item dari list sebelum respons sampai ke client"""
+    
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+    
+    async def blpop(self, key, timeout=0):
+        self._check()
+        if not self.items:
+            await asyncio.sleep(min(timeout, 0.05))
+            return None
+        value = self.items.pop(0)
+        await asyncio.sleep(self.delay)
+        return key, value
+
+@pytest.mark.unit
+async def test_46_drain_does_not_lose_popped_events(aggregator, monkeypatch):
+    """Test 46: worker yang sedang BLPOP saat deadline drain / cancel tidak menghilangkan event"""
+    broker = SlowPopRedisList(delay=0.1)
+    events = make_events(aggregator, 30)
+    broker.items = [json.dumps(e.model_dump()) for e in events]
+    processed = []
+    
+    async def slow_consume(event):
+        await asyncio.sleep(0.05)
+        processed.append(event.event_id)
+        return True, "ok"
+    
+    monkeypatch.setattr(aggregator, "consume_event", slow_consume)
+    monkeypatch.setitem(aggregator.app_state, "queue", aggregator.RedisListQueue(broker))
+    consumers = aggregator.ConsumerAutoscaler(3, 1, 3, False)
+    monkeypatch.setitem(aggregator.app_state, "consumers", consumers)
+    
+    runner = asyncio.create_task(consumers.run())
+    await asyncio.sleep(0.3)
+    cancelled = await consumers.drain(0.15)
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+    requeued = await consumers.settle()
+    consumers.executor.shutdown(wait=True)
+    
+    remaining = [json.loads(item)["event_id"] for item in broker.items]
+    assert cancelled <= 3 and requeued <= 3
+    assert sorted(processed + remaining) == sorted(e.event_id for e in events)
+    assert remaining == sorted(remaining, key=lambda event_id: int(event_id.split("-")[1]))
+    
+    # Worker di-cancel tanpa drain saat BLPOP sudah mengambil event: settle() mengembalikannya
+    consumers = aggregator.ConsumerAutoscaler(1, 1, 1, False)
+    monkeypatch.setitem(aggregator.app_state, "consumers", consumers)
+    head = broker.items[0]
+    consumers._spawn()
+    await asyncio.sleep(0.02)
+    assert head not in broker.items
+    task, _ = consumers.workers[0]
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    assert await consumers.settle() == 1
+    consumers.executor.shutdown(wait=True)
+    assert broker.items[0] == head
+    print("✓ Test 46: Drain does not lose popped events")
+
+@pytest.mark.unit
+def test_47_spool_prepend_is_crash_safe(aggregator, monkeypatch, tmp_path):
+    """Test 47: prepend menjaga urutan dan tidak menimpa batch pending sebelum header berpindah"""
+    path = str(tmp_path / "publish.spool")
+    
+    def batches(spool) -> List[str]:
+        names = []
+        while (batch := spool.peek()) is not None:
+            names.append(json.loads(batch[0])["batch"])
+            spool.pop()
+        return names
+    
+    spool = aggregator.PublishSpool(path, 64 * 1024, "always")
+    spool.open()
+    spool.append([json.dumps({"batch": "a", "padding": "x" * 100})])
+    spool.append([json.dumps({"batch": "b"})])
+    spool.append([json.dumps({"batch": "c"})])
+    spool.pop()
+    
+    # Ruang bekas batch "a" cukup: record baru ditulis di depan read_offset
+    spool.prepend([json.dumps({"batch": "front"})])
+    assert spool.read_offset > spool.HEADER.size
+    
+    # Tidak cukup ruang di depan: crash sebelum file baru menggantikan spool
+    def crash(*args):
+        raise OSError("simulated crash")
+    
+    with monkeypatch.context() as patch:
+        patch.setattr(aggregator.os, "replace", crash)
+        with pytest.raises(OSError):
+            spool.prepend([json.dumps({"batch": "lost", "padding": "x" * 1000})])
+    spool.close()
+    
+    recovered = aggregator.PublishSpool(path, 64 * 1024, "always")
+    recovered.open()
+    assert recovered.pending_batches == 3
+    assert recovered.prepend([json.dumps({"batch": "x", "padding": "x" * 1000})])
+    assert recovered.read_offset == recovered.HEADER.size
+    recovered.append([json.dumps({"batch": "z"})])
+    recovered.close()
+    
+    reopened = aggregator.PublishSpool(path, 64 * 1024, "always")
+    reopened.open()
+    assert batches(reopened) == ["x", "front", "b", "c", "z"]
+    reopened.close()
+    print("✓ Test 47: Spool prepend is crash safe")
+
+@pytest.mark.unit
+async def test_48_drain_under_load_requeues_to_spool(aggregator, monkeypatch, tmp_path):
+    """Test 48: shutdown di tengah beban tidak menghilangkan event; sisa queue kembali ke spool berurutan"""
+    path = str(tmp_path / "overflow.spool")
+    overflow = aggregator.PublishSpool(path, 4 * 1024 * 1024, "always")
+    overflow.open()
+    queue = aggregator.InProcessQueue(maxsize=300, overflow=overflow)
+    consumers = aggregator.ConsumerAutoscaler(4, 1, 4, False)
+    monkeypatch.setitem(aggregator.app_state, "queue", queue)
+    monkeypatch.setitem(aggregator.app_state, "consumers", consumers)
+    events = make_events(aggregator, 400)
+    processed = []
+    
+    async def slow_consume(event):
+        await asyncio.sleep(0.02)
+        # Sebagian event gagal selama drain: harus ikut dikembalikan ke queue
+        if consumers.draining and int(event.event_id.split("-")[1]) % 5 == 0:
+            return False, "database unavailable"
+        processed.append(event.event_id)
+        return True, "ok"
+    
+    monkeypatch.setattr(aggregator, "consume_event", slow_consume)
+    
+    async def publisher():
+        for start in range(0, len(events), 10):
+            await queue.push(events[start:start + 10])
+            await asyncio.sleep(0.01)
+    
+    runner = asyncio.create_task(consumers.run())
+    await publisher()  # publish berhenti saat drain dimulai (/publish 503)
+    
+    # Urutan shutdown sama dengan lifespan: drain -> stop task -> settle -> spill
+    assert await queue.size() > 0 and overflow.pending_batches > 0
+    await consumers.drain(0.3)
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+    consumers.executor.shutdown(wait=True)
+    requeued = await consumers.settle()
+    assert queue.spill() == 0
+    overflow.close()
+    assert requeued >= 1
+    
+    # Restart: spool dibaca ulang oleh queue baru
+    restarted = aggregator.PublishSpool(path, 4 * 1024 * 1024, "always")
+    restarted.open()
+    queue = aggregator.InProcessQueue(maxsize=20, overflow=restarted)
+    remaining = []
+    while (event := await queue.pop(timeout=0.05)) is not None:
+        remaining.append(event.event_id)
+    restarted.close()
+    
+    assert len(processed) + len(remaining) == len(events)
+    assert sorted(processed + remaining) == sorted(e.event_id for e in events)
+    assert remaining == sorted(remaining, key=lambda event_id: int(event_id.split("-")[1]))
+    assert remaining, "drain harus berhenti sebelum semua event diproses"
+    print("✓ Test 48: Drain under load requeues to spool")
+
+class BlockingQueue:
+    """Queue yang push-nya menggantung sampai `release` di-set"""
+    
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.pushed: List[str] = []
+    
+    async def push(self, events):
+        await self.release.wait()
+        self.pushed.extend(event.event_id for event in events)
+
+@pytest.mark.unit
+async def test_49_cancelled_publish_releases_idempotency_key(aggregator, monkeypatch):
+    """Test 49: /publish yang di-cancel saat enqueue melepas Idempotency-Key sehingga retry dijawab"""
+    queue = BlockingQueue()
+    monkeypatch.setitem(aggregator.app_state, "queue", queue)
+    monkeypatch.setitem(aggregator.app_state, "spool", None)
+    monkeypatch.setitem(aggregator.app_state, "idempotency", aggregator.IdempotencyStore(100, 3600))
+    batch = aggregator.EventBatch(events=make_events(aggregator, 3))
+    
+    first = asyncio.create_task(aggregator.publish_events(batch, idempotency_key="retry-key"))
+    await asyncio.sleep(0.05)
+    # Retry yang datang saat request pertama masih berjalan menunggu hasilnya
+    waiting = asyncio.create_task(aggregator.publish_events(batch, idempotency_key="retry-key"))
+    await asyncio.sleep(0.05)
+    first.cancel()
+    await asyncio.gather(first, return_exceptions=True)
+    
+    queue.release.set()
+    response = await asyncio.wait_for(waiting, timeout=2)
+    assert response.status_code == 202
+    assert queue.pushed == [f"unit-{i}" for i in range(3)]
+    
+    # Retry berikutnya di-acknowledge dari store tanpa enqueue ulang
+    replay = await asyncio.wait_for(aggregator.publish_events(batch, idempotency_key="retry-key"), timeout=2)
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert len(queue.pushed) == 3
+    print("✓ Test 49: Cancelled publish releases idempotency key")
+
+@pytest.mark.unit
+def test_50_rebalance_keeps_undelivered_outbox_rows(aggregator, monkeypatch, tmp_path):
+    """Test 50: rebalancing hanya menyalin tx_id NULL untuk row yang sudah terkirim ke semua subscriber"""
+    from types import SimpleNamespace
+    from sqlalchemy import create_engine, text
+    
+    engine = create_engine(f"sqlite:///{tmp_path / 'offsets.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE delivery_offsets (subscriber TEXT PRIMARY KEY, tx_id INTEGER, event_pk INTEGER)"))
+        conn.execute(text("INSERT INTO delivery_offsets VALUES ('fast', 900, 1), ('slow', 500, 7)"))
+    
+    monkeypatch.setattr(aggregator, "OUTBOX_SUBSCRIBERS", "")
+    assert aggregator.stored_outbox_horizon(engine) is None
+    monkeypatch.setattr(aggregator, "OUTBOX_SUBSCRIBERS", json.dumps([
+        {"name": "fast", "sink": "redis"}, {"name": "slow", "sink": "redis"}
+    ]))
+    assert aggregator.stored_outbox_horizon(engine) == 500
+    
+    rows = [SimpleNamespace(id=i, tx_id=tx_id) for i, tx_id in enumerate((None, 100, 499, 500, 800))]
+    delivered, pending = aggregator.undelivered_by_outbox(rows, 500)
+    assert [row.id for row in delivered] == [0, 1, 2]
+    assert [row.id for row in pending] == [3, 4]  # harus dikirim oleh dispatcher shard tujuan
+    assert aggregator.undelivered_by_outbox(rows, None) == (rows, [])
+    
+    # Subscriber baru tanpa offset tersimpan belum menerima apa pun
+    monkeypatch.setattr(aggregator, "OUTBOX_SUBSCRIBERS", json.dumps([
+        {"name": "fast", "sink": "redis"}, {"name": "new", "sink": "redis"}
+    ]))
+    assert aggregator.stored_outbox_horizon(engine) == 0
+    print("✓ Test 50: Rebalance keeps undelivered outbox rows")
+
+def builtin_schema_registry(aggregator):
+    registry = aggregator.SchemaRegistry()
+    for pattern, schema in aggregator.DEFAULT_PAYLOAD_SCHEMAS.items():
+        registry._activate(pattern, 1, schema)
+    return registry
+
+@pytest.mark.unit
+def test_51_schema_validation_modes(aggregator, monkeypatch):
+    """Test 51: SCHEMA_VALIDATION reject menolak batch, drop membuang event invalid, off melewatkan"""
+    monkeypatch.setitem(aggregator.app_state, "schemas", builtin_schema_registry(aggregator))
+    payload = {"payment_id": "PAY-10001", "order_id": "ORD-10001", "amount": 25.0, "method": "paypal", "status": "completed"}
+    events = [
+        aggregator.Event(
+            topic="payment.completed", event_id=f"pay-{i}", timestamp=datetime.now(timezone.utc).isoformat(),
+            source="test-runner", payload=dict(payload)
+        )
+        for i in range(4)
+    ]
+    events[1].payload["method"] = "cash"
+    events[3].payload.pop("amount")
+    
+    monkeypatch.setattr(aggregator, "SCHEMA_VALIDATION", "reject")
+    with pytest.raises(aggregator.HTTPException) as rejected:
+        aggregator.validate_payloads(events)
+    assert rejected.value.status_code == 422
+    assert [error["index"] for error in rejected.value.detail["errors"]] == [1, 3]
+    assert rejected.value.detail["errors"][0]["schema"] == "payment.*@v1"
+    
+    monkeypatch.setattr(aggregator, "SCHEMA_VALIDATION", "drop")
+    accepted, errors = aggregator.validate_payloads(events)
+    assert [e.event_id for e in accepted] == ["pay-0", "pay-2"]
+    assert [error["event_id"] for error in errors] == ["pay-1", "pay-3"]
+    
+    monkeypatch.setattr(aggregator, "SCHEMA_VALIDATION", "off")
+    assert aggregator.validate_payloads(events) == (events, [])
+    print("✓ Test 51: Schema validation modes")
+
+@pytest.mark.unit
+def test_52_generated_payloads_match_builtin_schemas(aggregator, publisher):
+    """Test 52: payload dari EventGenerator publisher lolos schema bawaan aggregator"""
+    random.seed(52)
+    registry = builtin_schema_registry(aggregator)
+    generator = publisher.EventGenerator()
+    events = [aggregator.Event(**generator.generate_event()) for _ in range(2000)]
+    # Pastikan setiap topic publisher (termasuk yang jarang di distribusi Zipf) ikut divalidasi
+    for topic in publisher.TOPICS:
+        events.extend(
+            aggregator.Event(topic=topic, event_id=f"{topic}-{i}", timestamp=datetime.now(timezone.utc).isoformat(),
+                             source="test-runner", payload=generator.generate_payload(topic))
+            for i in range(50)
+        )
+    
+    assert registry.validate_batch(events) == []
+    assert {registry.resolve(topic)[0] for topic in publisher.TOPICS} == set(aggregator.DEFAULT_PAYLOAD_SCHEMAS)
+    print("✓ Test 52: Generated payloads match built-in schemas")
+
+@pytest.mark.unit
+def test_53_archive_contains_decodes_group_once(aggregator, tmp_path):
+    """Test 53: cek duplikat di arsip men-decode tiap row group sekali dan memakai cache antar panggilan"""
+    topic = "archive.dedup"
+    archive = aggregator.ColumnarArchive(str(tmp_path), 4, 3)
+    base = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+    rows = [{
+        "id": i + 1,
+        "key_hash": aggregator.dedup_key_hash(topic, f"evt-{i}"),
+        "event_id": f"evt-{i}",
+        "timestamp": base,
+        "source": "archive-test",
+        "payload": "{}",
+        "processed_at": base + timedelta(seconds=i)
+    } for i in range(12)]
+    archive.write(topic, 0, rows)
+    
+    # Empat key di row group kedua + satu key dengan timestamp cocok tapi event_id lain
+    keys = [(row["key_hash"], topic, row["event_id"], row["processed_at"]) for row in rows[4:8]]
+    keys.append((aggregator.dedup_key_hash(topic, "other"), topic, "other", rows[5]["processed_at"]))
+    expected = {(topic, row["event_id"]) for row in rows[4:8]}
+    
+    assert archive.contains(keys) == expected
+    assert archive.key_groups_decoded == 1
+    assert archive.contains(keys) == expected
+    assert archive.key_groups_decoded == 1 and archive.key_group_cache_hits == 1
+    
+    # Key dari tiga row group berbeda: masing-masing di-decode sekali
+    spread = [(row["key_hash"], topic, row["event_id"], row["processed_at"]) for row in rows[::3]]
+    assert archive.contains(spread) == {(topic, row["event_id"]) for row in rows[::3]}
+    assert archive.key_groups_decoded == 3
+    print("✓ Test 53: Archive contains decodes each row group once")
+
 # ============================================================================
 # RUN SUMMARY
 # ============================================================================